@@ -4,7 +4,3 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "products"
-    
-    def ready(self):
-        None
-        # import products.signals
@@ -1,13 +1,18 @@
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db import connection, transaction
+from django.utils import timezone
 from faker import Faker
 import random
 from products.models import Product, Category, Brand
 import os
 import sys
 import csv
+import io
+import json
+import operator
+import re
 sys.path.append(os.path.join(os.path.dirname(__file__), 'assets'))
-from translation_model import translate_text
+from translation_model import translate_text, translate_many
 # Setup Django environment
 # sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../..')))
 # os.environ.setdefault("DJANGO_SETTINGS_MODULE", "product_search.settings")
@@ -59,6 +64,40 @@ CUSTOM_TRANSLATIONS = {
     "beverages": "مشروبات",
 }
 
+# Matches any CUSTOM_TRANSLATIONS key as a whole word, longest first
+CUSTOM_TRANSLATIONS_RE = re.compile(
+    r'\b(' + '|'.join(map(re.escape, sorted(CUSTOM_TRANSLATIONS, key=len, reverse=True))) + r')\b',
+    re.IGNORECASE,
+)
+
+# Columns streamed into products_product by COPY, in row order
+COPY_COLUMNS = (
+    'name_en', 'name_ar', 'description_en', 'description_ar',
+    'category_id', 'brand_id', 'nutrition_facts', 'updated_at',
+)
+
+# csv.writer leaves empty strings unquoted, which COPY would read as NULL;
+# FORCE_NOT_NULL keeps them as '' in the NOT NULL text columns
+COPY_SQL = (
+    f"COPY {Product._meta.db_table} ({', '.join(COPY_COLUMNS)}) "
+    "FROM STDIN WITH (FORMAT csv, "
+    "FORCE_NOT_NULL (name_en, name_ar, description_en, description_ar))"
+)
+
+# nutrition_facts keys and the CSV columns they are parsed from
+NUTRITION_COLUMNS = {
+    'calories': 'Calories (kcal)',
+    'protein_g': 'Protein (g)',
+    'carbs_g': 'Carbohydrates (g)',
+    'fat_g': 'Fat (g)',
+    'fiber_g': 'Fiber (g)',
+    'sugar_g': 'Sugars (g)',
+    'sodium_mg': 'Sodium (mg)',
+    'cholesterol_mg': 'Cholesterol (mg)',
+    'water_ml': 'Water_Intake (ml)',
+}
+NUTRITION_KEYS = tuple(NUTRITION_COLUMNS)
+
 # Simple English to Arabic character transliteration map
 EN_AR_CHAR_MAP = {
     'a': 'ا', 'b': 'ب', 'c': 'ك', 'd': 'د', 'e': 'ي', 'f': 'ف', 'g': 'ج', 'h': 'ه', 'i': 'ي', 'j': 'ج',
@@ -69,28 +108,44 @@ EN_AR_CHAR_MAP = {
     'U': 'و', 'V': 'ف', 'W': 'و', 'X': 'كس', 'Y': 'ي', 'Z': 'ز',
 }
 
+EN_AR_TRANS_TABLE = str.maketrans(EN_AR_CHAR_MAP)
+
 def transliterate_en_ar(text):
     # Transliterates each character to its Arabic equivalent
-    return ''.join(EN_AR_CHAR_MAP.get(c, c) for c in text)
+    return text.translate(EN_AR_TRANS_TABLE)
+
+# Translations computed so far, keyed by (lowercased text, from_code, to_code)
+TRANSLATION_CACHE = {}
+
+def prefetch_translations(texts, from_code, to_code):
+    # Translate every text not cached yet in batches and store the results
+    pending = {}
+    for text in texts:
+        key = (text.lower(), from_code, to_code)
+        if key not in TRANSLATION_CACHE:
+            pending.setdefault(key, text)
+    originals = list(pending.values())
+    translated = translate_many(originals, from_code, to_code)
+    for key, text, result in zip(pending, originals, translated):
+        TRANSLATION_CACHE[key] = apply_fallbacks(text, result)
 
 def smart_translate(text, from_code, to_code):
-    translated = translate_text(text, from_code, to_code)
-    replaced = False
+    key = (text.lower(), from_code, to_code)
+    if key not in TRANSLATION_CACHE:
+        TRANSLATION_CACHE[key] = apply_fallbacks(text, translate_text(text, from_code, to_code))
+    return TRANSLATION_CACHE[key]
+
+def apply_fallbacks(text, translated):
+    # The model echoes words it doesn't know; patch those with the custom
+    # dictionary, or transliterate as a last resort
     if translated.strip().lower() == text.strip().lower():
-        # Try to replace known words
-        for en_word, ar_word in CUSTOM_TRANSLATIONS.items():
-            if en_word.lower() in text.lower():
-                replaced = True
-                # Replace whole word (case-insensitive)
-                translated = text
-                for word in text.split():
-                    lw = word.lower()
-                    if lw in CUSTOM_TRANSLATIONS:
-                        translated = translated.replace(word, CUSTOM_TRANSLATIONS[lw])
-                break
-    if not replaced and translated.strip().lower() == text.strip().lower():
-        # Fallback: transliterate
-        translated = transliterate_en_ar(text)
+        # Replace known words (whole word, case-insensitive)
+        translated, replaced = CUSTOM_TRANSLATIONS_RE.subn(
+            lambda m: CUSTOM_TRANSLATIONS[m.group(1).lower()], text
+        )
+        if not replaced:
+            # Fallback: transliterate
+            translated = transliterate_en_ar(text)
     return translated
 
 class Command(BaseCommand):
@@ -98,69 +153,89 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('--csv-path', type=str, default=os.path.join(os.path.dirname(__file__), 'assets/Dataset/daily_food_nutrition_dataset.csv'), help='Path to the CSV file')
-        parser.add_argument('--batch-size', type=int, default=1000, help='Batch size for bulk creation')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of rows sent per COPY')
 
     def handle(self, *args, **options):
         csv_path = options['csv_path']
         batch_size = options['batch_size']
         self.stdout.write(f'Loading data from {csv_path}...')
         with open(csv_path, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            products = []
-            categories = {}
-            brands = {}
+            # Rows are plain lists; resolve the column positions once
+            reader = csv.reader(csvfile)
+            header = {name: i for i, name in enumerate(next(reader))}
+            name_idx = header['Food_Item']
+            cat_idx = header['Category']
+            # Brand (use Food_Item as brand if no brand info)
+            brand_idx = header.get('Brand', name_idx)
+            nutrition_values = operator.itemgetter(*(header[column] for column in NUTRITION_COLUMNS.values()))
+
+            # First pass: collect every distinct string that needs translating
+            # and every category/brand name
+            texts = set()
+            cat_names = set()
+            brand_names = set()
             for row in reader:
-                # Category
-                cat_name_en = row['Category']
-                cat_name_ar = smart_translate(cat_name_en, 'en', 'ar')
-                if cat_name_en not in categories:
-                    cat_obj, _ = Category.objects.get_or_create(name=cat_name_en)
-                    categories[cat_name_en] = cat_obj
-                category = categories[cat_name_en]
-
-                # Brand (use Food_Item as brand if no brand info)
-                brand_name = row.get('Brand', row['Food_Item'])
-                if brand_name not in brands:
-                    brand_obj, _ = Brand.objects.get_or_create(name=brand_name)
-                    brands[brand_name] = brand_obj
-                brand = brands[brand_name]
-
-                # Product names
-                name_en = row['Food_Item']
-                name_ar = smart_translate(name_en, 'en', 'ar')
-                desc_en = f"{name_en} ({cat_name_en})"
-                desc_ar = smart_translate(desc_en, 'en', 'ar')
-
-                # Nutrition facts
-                nutrition_facts = {
-                    'calories': float(row['Calories (kcal)']),
-                    'protein_g': float(row['Protein (g)']),
-                    'carbs_g': float(row['Carbohydrates (g)']),
-                    'fat_g': float(row['Fat (g)']),
-                    'fiber_g': float(row['Fiber (g)']),
-                    'sugar_g': float(row['Sugars (g)']),
-                    'sodium_mg': float(row['Sodium (mg)']),
-                    'cholesterol_mg': float(row['Cholesterol (mg)']),
-                    'water_ml': float(row['Water_Intake (ml)']),
-                }
-
-                products.append(Product(
-                    name_en=name_en,
-                    name_ar=name_ar,
-                    description_en=desc_en,
-                    description_ar=desc_ar,
-                    category=category,
-                    brand=brand,
-                    nutrition_facts=nutrition_facts
-                ))
-
-                if len(products) >= batch_size:
-                    Product.objects.bulk_create(products)
-                    products = []
-
-            if products:
-                Product.objects.bulk_create(products)
+                name_en = row[name_idx]
+                cat_name_en = row[cat_idx]
+                texts.update((cat_name_en, name_en, f"{name_en} ({cat_name_en})"))
+                cat_names.add(cat_name_en)
+                brand_names.add(row[brand_idx])
+            self.stdout.write(f'Translating {len(texts)} unique strings...')
+            prefetch_translations(texts, 'en', 'ar')
+
+            # Upsert categories and brands in bulk, then load them in one query each
+            Category.objects.bulk_create([Category(name=n) for n in cat_names], ignore_conflicts=True)
+            Brand.objects.bulk_create([Brand(name=n) for n in brand_names], ignore_conflicts=True)
+            categories = {c.name: c for c in Category.objects.filter(name__in=cat_names)}
+            brands = {b.name: b for b in Brand.objects.filter(name__in=brand_names)}
+
+            # Second pass: stream products straight into the table with COPY,
+            # translations are now cache hits
+            csvfile.seek(0)
+            reader = csv.reader(csvfile)
+            next(reader)
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            pending = 0
+            # COPY bypasses auto_now, so stamp every row explicitly
+            updated_at = timezone.now().isoformat()
+            with transaction.atomic(), connection.cursor() as cursor:
+                for row in reader:
+                    cat_name_en = row[cat_idx]
+                    category = categories[cat_name_en]
+                    brand = brands[row[brand_idx]]
+
+                    # Product names
+                    name_en = row[name_idx]
+                    name_ar = smart_translate(name_en, 'en', 'ar')
+                    desc_en = f"{name_en} ({cat_name_en})"
+                    desc_ar = smart_translate(desc_en, 'en', 'ar')
+
+                    # Nutrition facts
+                    nutrition_facts = dict(zip(NUTRITION_KEYS, map(float, nutrition_values(row))))
+
+                    writer.writerow((
+                        name_en, name_ar, desc_en, desc_ar,
+                        category.id, brand.id, json.dumps(nutrition_facts), updated_at,
+                    ))
+                    pending += 1
+
+                    if pending >= batch_size:
+                        self._copy_buffer(cursor, COPY_SQL, buffer)
+                        pending = 0
+
+                if pending:
+                    self._copy_buffer(cursor, COPY_SQL, buffer)
         self.stdout.write(self.style.SUCCESS('CSV data import complete!'))
         # Show a few products
         for prod in Product.objects.all()[:5]:
             self.stdout.write(f"EN: {prod.name_en} | AR: {prod.name_ar} | Nutrition: {prod.nutrition_facts}")
+
+    def _copy_buffer(self, cursor, copy_sql, buffer):
+        """
+        Send the CSV rows accumulated in `buffer` with one COPY and reset it.
+        """
+        buffer.seek(0)
+        cursor.copy_expert(copy_sql, buffer)
+        buffer.seek(0)
+        buffer.truncate()
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-15 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0003_product_nutrition_facts"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="brand",
+            name="name",
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name="category",
+            name="name",
+            field=models.CharField(max_length=100, unique=True),
+        ),
+    ]
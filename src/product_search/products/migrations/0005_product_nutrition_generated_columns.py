@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1 on 2026-10-15 09:30
+
+import django.db.models.fields.json
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0004_unique_category_brand_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="calories_cached",
+            field=models.GeneratedField(
+                db_index=True,
+                db_persist=True,
+                expression=django.db.models.functions.comparison.Cast(
+                    django.db.models.fields.json.KeyTextTransform(
+                        "calories", "nutrition_facts"
+                    ),
+                    models.FloatField(),
+                ),
+                output_field=models.FloatField(),
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="protein_g_cached",
+            field=models.GeneratedField(
+                db_index=True,
+                db_persist=True,
+                expression=django.db.models.functions.comparison.Cast(
+                    django.db.models.fields.json.KeyTextTransform(
+                        "protein_g", "nutrition_facts"
+                    ),
+                    models.FloatField(),
+                ),
+                output_field=models.FloatField(),
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-15 10:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0005_product_nutrition_generated_columns"),
+    ]
+
+    operations = [
+        # Name columns are indexed in 0002; add the description columns so
+        # every trigram_similar (%) lookup in the search can use an index
+        migrations.RunSQL(
+            sql="""
+            CREATE INDEX IF NOT EXISTS products_product_description_en_gin_trgm ON products_product USING gin (description_en gin_trgm_ops);
+            CREATE INDEX IF NOT EXISTS products_product_description_ar_gin_trgm ON products_product USING gin (description_ar gin_trgm_ops);
+            """,
+            reverse_sql="""
+            DROP INDEX IF EXISTS products_product_description_en_gin_trgm;
+            DROP INDEX IF EXISTS products_product_description_ar_gin_trgm;
+            """
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-15 11:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0007_product_updated_at"),
+    ]
+
+    operations = [
+        # Keep search_vector in sync inside the INSERT/UPDATE itself instead of
+        # a second UPDATE from Python. English text uses the english config,
+        # Arabic text the simple one, so both go into the same vector.
+        migrations.RunSQL(
+            sql="""
+            CREATE OR REPLACE FUNCTION products_product_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector :=
+                    to_tsvector('pg_catalog.english', coalesce(NEW.name_en, '') || ' ' || coalesce(NEW.description_en, '')) ||
+                    to_tsvector('pg_catalog.simple', coalesce(NEW.name_ar, '') || ' ' || coalesce(NEW.description_ar, ''));
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+
+            CREATE TRIGGER products_product_search_vector_trigger
+            BEFORE INSERT OR UPDATE OF name_en, name_ar, description_en, description_ar ON products_product
+            FOR EACH ROW EXECUTE FUNCTION products_product_search_vector_update();
+
+            UPDATE products_product SET name_en = name_en;
+            """,
+            reverse_sql="""
+            DROP TRIGGER IF EXISTS products_product_search_vector_trigger ON products_product;
+            DROP FUNCTION IF EXISTS products_product_search_vector_update();
+            """
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.1 on 2026-10-15 12:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("products", "0008_search_vector_trigger"),
+    ]
+
+    operations = [
+        # Store names with weight A and descriptions with weight B so
+        # SearchRank scores against the stored vector without any
+        # setweight work at query time
+        migrations.RunSQL(
+            sql="""
+            CREATE OR REPLACE FUNCTION products_product_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector :=
+                    setweight(to_tsvector('pg_catalog.english', coalesce(NEW.name_en, '')), 'A') ||
+                    setweight(to_tsvector('pg_catalog.english', coalesce(NEW.description_en, '')), 'B') ||
+                    setweight(to_tsvector('pg_catalog.simple', coalesce(NEW.name_ar, '')), 'A') ||
+                    setweight(to_tsvector('pg_catalog.simple', coalesce(NEW.description_ar, '')), 'B');
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+
+            UPDATE products_product SET name_en = name_en;
+            """,
+            reverse_sql="""
+            CREATE OR REPLACE FUNCTION products_product_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector :=
+                    to_tsvector('pg_catalog.english', coalesce(NEW.name_en, '') || ' ' || coalesce(NEW.description_en, '')) ||
+                    to_tsvector('pg_catalog.simple', coalesce(NEW.name_ar, '') || ' ' || coalesce(NEW.description_ar, ''));
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+
+            UPDATE products_product SET name_en = name_en;
+            """
+        ),
+    ]
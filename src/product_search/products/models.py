@@ -1,13 +1,15 @@
 from django.db import models
 from django.contrib.postgres.indexes import GinIndex
 from django.contrib.postgres.search import SearchVectorField
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast
 
 class Category(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, unique=True)
     def __str__(self): return self.name
 
 class Brand(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, unique=True)
     def __str__(self): return self.name
 
 class Product(models.Model):
@@ -21,6 +23,22 @@ class Product(models.Model):
     search_vector = SearchVectorField(null=True)
     
     nutrition_facts = models.JSONField(null=True, blank=True)
+    # Nutrition values used by the search filters, extracted from the JSON
+    # into indexed columns so range filters don't scan the whole table
+    calories_cached = models.GeneratedField(
+        expression=Cast(KeyTextTransform('calories', 'nutrition_facts'), models.FloatField()),
+        output_field=models.FloatField(),
+        db_persist=True,
+        db_index=True,
+    )
+    protein_g_cached = models.GeneratedField(
+        expression=Cast(KeyTextTransform('protein_g', 'nutrition_facts'), models.FloatField()),
+        output_field=models.FloatField(),
+        db_persist=True,
+        db_index=True,
+    )
+    # Used to build ETags for the search endpoint
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         indexes = [
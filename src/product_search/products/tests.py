@@ -1,3 +1,84 @@
-from django.test import TestCase
+import csv
+import io
 
-# Create your tests here.
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.request import Request
+
+from products.management.commands.generate_fake_data_from_csv import (
+    COPY_SQL, Command, apply_fallbacks, transliterate_en_ar,
+)
+from products.models import Brand, Category, Product
+from products.views import plan_query, search_etag
+
+
+class ApplyFallbacksTests(SimpleTestCase):
+    def test_keeps_model_translation(self):
+        self.assertEqual(apply_fallbacks("Egg", "بيضة"), "بيضة")
+
+    def test_replaces_known_words_case_insensitively(self):
+        self.assertEqual(apply_fallbacks("Chicken RICE", "Chicken RICE"), "دجاج أرز")
+
+    def test_replaces_words_wrapped_in_punctuation(self):
+        self.assertEqual(apply_fallbacks("Fruits (Fruits)", "Fruits (Fruits)"), "فواكه (فواكه)")
+
+    def test_key_inside_longer_word_is_transliterated(self):
+        # "bar" is a dictionary key but only whole words are replaced
+        self.assertEqual(apply_fallbacks("Barley", "Barley"), "بارليي")
+
+
+class CopyImportTests(TestCase):
+    def test_empty_text_fields_are_stored_as_empty_strings(self):
+        category = Category.objects.create(name="Fruits")
+        brand = Brand.objects.create(name="Apple")
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow((
+            "", "", "", "", category.id, brand.id, '{"calories": 52.0}', timezone.now().isoformat(),
+        ))
+        with connection.cursor() as cursor:
+            Command()._copy_buffer(cursor, COPY_SQL, buffer)
+        product = Product.objects.get()
+        self.assertEqual(product.name_en, "")
+        self.assertEqual(product.name_ar, "")
+        self.assertEqual(product.description_en, "")
+        self.assertEqual(product.description_ar, "")
+
+
+class TransliterateTests(SimpleTestCase):
+    def test_multi_character_mapping(self):
+        self.assertEqual(transliterate_en_ar("Box"), "بوكس")
+
+    def test_unmapped_characters_are_kept(self):
+        self.assertEqual(transliterate_en_ar("x-1"), "كس-1")
+
+
+class PlanQueryTests(SimpleTestCase):
+    def test_splits_mixed_script_query(self):
+        english_part, arabic_part, ts_query = plan_query("milk حليب")
+        self.assertEqual(english_part, "milk ")
+        self.assertEqual(arabic_part, "حليب")
+        self.assertEqual(
+            ts_query,
+            SearchQuery("milk ", search_type='websearch', config='english')
+            | SearchQuery("حليب", search_type='websearch', config='simple'),
+        )
+
+    def test_arabic_only_query(self):
+        english_part, arabic_part, ts_query = plan_query("حليب")
+        self.assertEqual(english_part, "")
+        self.assertEqual(arabic_part, "حليب")
+        self.assertEqual(ts_query, SearchQuery("حليب", search_type='websearch', config='simple'))
+
+    def test_empty_query_has_no_tsquery(self):
+        self.assertEqual(plan_query(""), ("", "", None))
+
+    def test_repeated_query_is_cached(self):
+        self.assertIs(plan_query("oats"), plan_query("oats"))
+
+
+class SearchEtagTests(SimpleTestCase):
+    def test_no_etag_without_query(self):
+        request = Request(RequestFactory().get('/api/v1/products/search/', {'q': '  '}))
+        self.assertIsNone(search_etag(request))
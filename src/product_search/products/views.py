@@ -1,13 +1,19 @@
+import functools
+import hashlib
+import re
+
 from django.contrib.postgres.search import TrigramSimilarity, SearchQuery, SearchRank, SearchVector
-from django.db.models import Q, F, Value
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import BooleanField, Count, ExpressionWrapper, Max, Q, F, Value
 from django.db.models.functions import Greatest
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.throttling import AnonRateThrottle
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_cookie
+from django.utils.http import quote_etag
+from django.views.decorators.http import etag
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
@@ -17,6 +23,79 @@ from .serializers import ProductSerializer
 class ProductSearchRateThrottle(AnonRateThrottle):
     rate = '30/minute'
 
+# Runs of Arabic / non-Arabic characters, used to split mixed-language queries
+ARABIC_RE = re.compile(r'[\u0600-\u06FF]+')
+NON_ARABIC_RE = re.compile(r'[^\u0600-\u06FF]+')
+
+# Columns fetched for search results, one flat row per product
+SEARCH_RESULT_FIELDS = (
+    'id', 'name_en', 'name_ar', 'description_en', 'description_ar', 'nutrition_facts',
+    'category', 'category__name', 'brand', 'brand__name',
+)
+
+def prepare_tsquery(query, config='english'):
+    """
+    Prepare a tsquery with websearch_to_tsquery, which parses quoted
+    phrases, OR and -exclusions in a single pass.
+    """
+    return SearchQuery(query, search_type='websearch', config=config)
+
+@functools.lru_cache(maxsize=4096)
+def plan_query(query):
+    """
+    Split a search query into its English and Arabic parts and build the
+    full-text query for them. Returns (english_part, arabic_part, ts_query),
+    ts_query being None when neither part is present.
+    Cached since identical queries come in bursts (e.g. suggestions while
+    typing); reusing the SearchQuery is safe as Django copies expressions
+    when resolving them.
+    """
+    english_part = ''.join(NON_ARABIC_RE.findall(query))
+    arabic_part = ''.join(ARABIC_RE.findall(query))
+    combined_query = []
+    if english_part:
+        combined_query.append(prepare_tsquery(english_part, 'english'))
+    if arabic_part:
+        combined_query.append(prepare_tsquery(arabic_part, 'simple'))
+    if len(combined_query) == 2:
+        ts_query = combined_query[0] | combined_query[1]
+    elif len(combined_query) == 1:
+        ts_query = combined_query[0]
+    else:
+        ts_query = None
+    return english_part, arabic_part, ts_query
+
+PRODUCTS_VERSION_CACHE_KEY = 'products:version'
+SEARCH_CACHE_TIMEOUT = 60 * 15
+
+def products_version():
+    """
+    Fingerprint of the product table (latest update time and row count),
+    cached for a minute so ETag checks don't hit the database every time.
+    """
+    version = cache.get(PRODUCTS_VERSION_CACHE_KEY)
+    if version is None:
+        stats = Product.objects.aggregate(last_modified=Max('updated_at'), total=Count('id'))
+        version = f"{stats['last_modified']}:{stats['total']}"
+        cache.set(PRODUCTS_VERSION_CACHE_KEY, version, 60)
+    return version
+
+def search_etag(request, *args, **kwargs):
+    """
+    ETag for the search endpoint: same query, representation and product
+    data means the client's copy is still valid and gets a 304.
+    None for requests without a query, so they get their 400 without
+    conditional handling or a fingerprint query.
+    """
+    if not request.query_params.get('q', '').strip():
+        return None
+    key = '|'.join((
+        request.META.get('QUERY_STRING', ''),
+        request.META.get('HTTP_ACCEPT', ''),
+        products_version(),
+    ))
+    return hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+
 class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for searching products with advanced features:
@@ -56,8 +135,7 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
             400: 'Bad Request'
         }
     )
-    @method_decorator(cache_page(60*15))  # Cache for 15 minutes
-    @method_decorator(vary_on_cookie)
+    @method_decorator(etag(search_etag))  # 304 before any search or serialization runs
     @action(detail=False, methods=['get'])
     def search(self, request):
         """
@@ -74,74 +152,114 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        search_type = request.query_params.get('search_type', 'full_text')
-        english_part = ''.join(c for c in query if not ('\u0600' <= c <= '\u06FF'))
-        arabic_part = ''.join(c for c in query if ('\u0600' <= c <= '\u06FF'))
+        # Results are cached under their ETag, so a cached body is always sent
+        # with the ETag of the product data it was built from
+        response_etag = search_etag(request)
+        cache_key = f'products:search:{response_etag}'
+        data = cache.get(cache_key)
+        if data is None:
+            data = self._search(query, request.query_params)
+            cache.set(cache_key, data, SEARCH_CACHE_TIMEOUT)
+        response = Response(data)
+        response['ETag'] = quote_etag(response_etag)
+        return response
 
+    def _search(self, query, params):
+        """
+        Run the requested search strategy and return the result dicts.
+        """
+        search_type = params.get('search_type', 'full_text')
+        english_part, arabic_part, ts_query = plan_query(query)
+
+        # Filters go on the base queryset so every strategy can apply its
+        # LIMIT in SQL and the fallbacks only kick in when nothing matches
+        queryset = self._apply_filters(Product.objects.all(), params)
+        queryset = queryset.values(*SEARCH_RESULT_FIELDS)
         if search_type == 'trigram':
-            search_results = self._trigram_search(english_part, arabic_part)
+            search_results = self._trigram_search(queryset, english_part, arabic_part)
         elif search_type == 'hybrid':
-            search_results = self._hybrid_search(query, english_part, arabic_part)
+            search_results = self._hybrid_search(queryset, ts_query, english_part, arabic_part)
         else:
-            search_results = self._full_text_search(query, english_part, arabic_part)
+            search_results = self._full_text_search(queryset, ts_query, english_part, arabic_part)
 
-        search_results = self._apply_filters(search_results, request.query_params)
-        search_results = search_results.select_related('category', 'brand')[:20]
-        serializer = self.get_serializer(search_results, many=True)
-        return Response(serializer.data)
+        # Same shape as ProductSerializer, built straight from the value rows
+        return [
+            {
+                'id': row['id'],
+                'name_en': row['name_en'],
+                'name_ar': row['name_ar'],
+                'description_en': row['description_en'],
+                'description_ar': row['description_ar'],
+                'category': {'id': row['category'], 'name': row['category__name']},
+                'brand': {'id': row['brand'], 'name': row['brand__name']},
+                'nutrition_facts': row['nutrition_facts'],
+            }
+            for row in search_results
+        ]
 
-    def _full_text_search(self, full_query, english_part, arabic_part):
+    def _full_text_search(self, queryset, ts_query, english_part, arabic_part, limit=20):
         """
         PostgreSQL full-text search using tsquery and tsvector
         Handles both English and Arabic queries using a unified search_vector.
+        Returns at most `limit` product rows, best ranked first.
         """
-        combined_query = []
-        if english_part:
-            english_search_query = self._prepare_tsquery(english_part, 'english')
-            combined_query.append(english_search_query)
-        if arabic_part:
-            arabic_search_query = self._prepare_tsquery(arabic_part, 'simple')
-            combined_query.append(arabic_search_query)
-        if len(combined_query) == 2:
-            final_query = combined_query[0] | combined_query[1]
-        elif len(combined_query) == 1:
-            final_query = combined_query[0]
-        else:
-            return Product.objects.none()
-        results = Product.objects.filter(
-            search_vector=final_query
+        if ts_query is None:
+            return []
+        results = list(queryset.filter(
+            search_vector=ts_query
         ).annotate(
-            rank=SearchRank(F('search_vector'), final_query)
-        ).order_by('-rank')
-        if results.exists():
+            rank=SearchRank(F('search_vector'), ts_query)
+        ).order_by('-rank')[:limit])
+        if results:
             return results
-        return self._fallback_search(full_query, english_part, arabic_part)
+        return self._fallback_search(queryset, english_part, arabic_part, limit)
 
-    def _prepare_tsquery(self, query, config='english'):
+    def _trigram_search(self, queryset, english_part, arabic_part, limit=20):
         """
-        Prepare a tsquery for partial matching and special operators.
+        Trigram similarity search for handling misspellings and partial matches.
         """
-        words = query.replace("'", "").replace('"', '').strip().split()
-        if not words:
-            return SearchQuery('')
-        search_query = None
-        for word in words:
-            if len(word) < 2:
-                continue
-            word_query = SearchQuery(f"{word}:*", search_type='raw', config=config)
-            if search_query is None:
-                search_query = word_query
-            else:
-                search_query = search_query | word_query
-        return search_query or SearchQuery('')
+        queryset, min_threshold = self._annotate_similarity(queryset, english_part, arabic_part)
+        if min_threshold is None:
+            return []
+        queryset = queryset.filter(
+            self._trigram_candidates(english_part, arabic_part), best_score__gt=min_threshold
+        ).order_by('-best_score')
+        with transaction.atomic():
+            self._set_trigram_threshold(min_threshold)
+            return list(queryset[:limit])
 
-    def _trigram_search(self, english_part, arabic_part):
+    def _trigram_candidates(self, english_part, arabic_part):
         """
-        Trigram similarity search for handling misspellings and partial matches.
+        `%` (trigram_similar) conditions, answered by the GIN trigram indexes,
+        that narrow the rows before similarity scores are computed.
+        """
+        candidates = Q()
+        if english_part:
+            candidates |= Q(name_en__trigram_similar=english_part) | Q(description_en__trigram_similar=english_part)
+        if arabic_part:
+            candidates |= Q(name_ar__trigram_similar=arabic_part) | Q(description_ar__trigram_similar=arabic_part)
+        return candidates
+
+    def _set_trigram_threshold(self, threshold):
+        """
+        Make `%` use the same threshold as the `best_score` filter, so the
+        index pre-filter never drops a row that would have scored high enough
+        (Postgres' default of 0.3 loses most misspellings). The setting is
+        transaction-local, so call it inside the atomic block running the query.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.similarity_threshold', %s, true)", [str(threshold)]
+            )
+
+    def _annotate_similarity(self, queryset, english_part, arabic_part):
+        """
+        Annotate `best_score` (the best trigram similarity over the name and
+        description fields) and return it with the threshold to filter on.
+        The threshold is None when there is nothing to compare against.
         """
         en_threshold = 0.05 if len(english_part) <= 2 else 0.1
         ar_threshold = 0.05 if len(arabic_part) <= 2 else 0.1
-        queryset = Product.objects.all()
         similarity_expressions = []
         if english_part:
             queryset = queryset.annotate(
@@ -156,35 +274,49 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
             )
             similarity_expressions.extend(['name_ar_sim', 'desc_ar_sim'])
         if not similarity_expressions:
-            return queryset.none()
+            return queryset, None
         queryset = queryset.annotate(
             best_score=Greatest(*[F(expr) for expr in similarity_expressions], Value(0.0))
         )
         min_threshold = min(en_threshold, ar_threshold) if arabic_part and english_part else (en_threshold if english_part else ar_threshold)
-        return queryset.filter(best_score__gt=min_threshold).order_by('-best_score')
+        return queryset, min_threshold
 
-    def _hybrid_search(self, full_query, english_part, arabic_part):
+    def _hybrid_search(self, queryset, ts_query, english_part, arabic_part, limit=20):
         """
-        Hybrid search: try full-text first, then trigram if no results.
+        Hybrid search: full-text first, then trigram matches for the remaining
+        slots if it returned fewer than `limit` products.
         """
-        full_text_results = self._full_text_search(full_query, english_part, arabic_part)
-        if full_text_results.exists():
-            return full_text_results
-        return self._trigram_search(english_part, arabic_part)
+        results = self._full_text_search(queryset, ts_query, english_part, arabic_part, limit)
+        if len(results) < limit:
+            seen = [row['id'] for row in results]
+            results += self._trigram_search(
+                queryset.exclude(pk__in=seen), english_part, arabic_part, limit - len(results)
+            )
+        return results
 
-    def _fallback_search(self, full_query, english_part, arabic_part):
+    def _fallback_search(self, queryset, english_part, arabic_part, limit=20):
         """
-        Fallback: ILIKE on name fields, then trigram.
+        Fallback: ILIKE on name fields ranked first, then trigram matches,
+        in a single query.
         """
-        combined_query = Q()
+        direct_match = Q()
         if english_part:
-            combined_query |= Q(name_en__icontains=english_part)
+            direct_match |= Q(name_en__icontains=english_part)
         if arabic_part:
-            combined_query |= Q(name_ar__icontains=arabic_part)
-        direct_matches = Product.objects.filter(combined_query)
-        if direct_matches.exists():
-            return direct_matches
-        return self._trigram_search(english_part, arabic_part)
+            direct_match |= Q(name_ar__icontains=arabic_part)
+        queryset, min_threshold = self._annotate_similarity(queryset, english_part, arabic_part)
+        if min_threshold is None:
+            return []
+        queryset = queryset.filter(
+            direct_match | self._trigram_candidates(english_part, arabic_part)
+        ).annotate(
+            direct_match=ExpressionWrapper(direct_match, output_field=BooleanField())
+        ).filter(
+            direct_match | Q(best_score__gt=min_threshold)
+        ).order_by('-direct_match', '-best_score')
+        with transaction.atomic():
+            self._set_trigram_threshold(min_threshold)
+            return list(queryset[:limit])
 
     def _apply_filters(self, queryset, params):
         """
@@ -198,8 +330,8 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(brand__name__icontains=brand)
         max_calories = params.get('max_calories')
         if max_calories:
-            queryset = queryset.filter(nutrition_facts__calories__lte=int(max_calories))
+            queryset = queryset.filter(calories_cached__lte=int(max_calories))
         min_protein = params.get('min_protein')
         if min_protein:
-            queryset = queryset.filter(nutrition_facts__protein__gte=int(min_protein))
+            queryset = queryset.filter(protein_g_cached__gte=int(min_protein))
         return queryset